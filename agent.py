@@ -6,17 +6,442 @@ This agent interprets natural language requests and executes
 restricted PowerShell commands to solve administrative tasks.
 """
 
-import json
+import asyncio
+import atexit
+import base64
+import hashlib
 import os
+import queue
+import re
+import shutil
 import subprocess
 import sys
-from typing import Dict, List, Optional, Tuple, Any
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple, Any
+import httpx
+import orjson
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+# Optional dependencies for the semantic cache
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Flags that keep pwsh startup lean: no banner, profile or prompts
+PWSH_FLAGS = ['-NoLogo', '-NoProfile', '-NonInteractive']
+
+# Connection pool settings for the LLM clients
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=30.0
+)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Location of the persisted LLM response cache
+RESPONSE_CACHE_PATH = os.path.expanduser('~/.poshcomputer_cache.json')
+
+# Cached result of the pwsh installation probe
+PWSH_PROBE_CACHE_PATH = os.path.expanduser('~/.cache/poshcomputer/pwsh_probe.json')
+
+# Base path of the persisted semantic cache (.faiss index + .json sidecar)
+SEMANTIC_CACHE_PATH = os.path.expanduser('~/.poshcomputer_semantic')
+
+
+class ErrorCode(IntEnum):
+    """Machine-readable reason reported as 'error_code' in result dictionaries."""
+    OK = 0
+    EMPTY_COMMAND = 1
+    DANGEROUS_PATTERN = 2
+    NOT_ALLOWED = 3
+    EXECUTION_FAILED = 4
+    TIMEOUT = 5
+    INTERNAL_ERROR = 6
+    INTERPRETATION_FAILED = 7
+
+
+def load_config(config_path: str = "config.json") -> Dict[str, Any]:
+    """Load the agent configuration.
+    
+    The parsed configuration is reused within the process as long as the
+    modification time of the file has not changed. The same dictionary is
+    returned each time, so callers must not modify it.
+    
+    Args:
+        config_path: Path to the configuration file
+        
+    Returns:
+        The configuration dictionary
+    """
+    config_path = os.path.abspath(config_path)
+    return _read_config(config_path, os.path.getmtime(config_path))
+
+
+@lru_cache(maxsize=None)
+def _read_config(config_path: str, mtime: float) -> Dict[str, Any]:
+    """Read a configuration file, memoized per path and modification time."""
+    with open(config_path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+class ResponseCache:
+    """Exact-match LRU cache for LLM interpretations, persisted between runs."""
+    
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, maxsize: int = 512):
+        """Initialize the cache and load previously saved entries.
+        
+        Args:
+            path: JSON file used to persist the cache
+            maxsize: Maximum number of entries kept before evicting the oldest
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._load()
+    
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_request: str,
+                 temperature: float, max_tokens: int) -> str:
+        """Build a cache key from everything that influences the LLM response."""
+        payload = orjson.dumps([model, system_prompt, user_request, temperature, max_tokens])
+        return hashlib.sha256(payload).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss."""
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+    
+    def put(self, key: str, response: str):
+        """Store a response, evicting the least recently used entries."""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def _load(self):
+        """Load entries from disk, ignoring a missing or corrupt cache file."""
+        try:
+            with open(self.path, 'rb') as f:
+                entries = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return
+        
+        if isinstance(entries, dict):
+            for key, response in list(entries.items())[-self.maxsize:]:
+                if isinstance(response, str) and response:
+                    self._entries[key] = response
+    
+    def save(self):
+        """Write the cache to disk. Failures are not fatal."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(self._entries))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save response cache: {e}", file=sys.stderr)
+
+
+class SemanticCache:
+    """Embedding-based cache that maps paraphrased requests to earlier commands."""
+    
+    def __init__(self, namespace: str, threshold: float = 0.92,
+                 model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                 path: str = SEMANTIC_CACHE_PATH, maxsize: int = 512):
+        """Initialize the embedding model and load a previously saved index.
+        
+        Args:
+            namespace: Identifies the model and allowed commands; a saved index
+                from a different namespace is discarded
+            threshold: Minimum cosine similarity for a cache hit
+            model_name: sentence-transformers model used for embeddings
+            path: Base path for the persisted index and its JSON sidecar
+            maxsize: Maximum number of entries kept before evicting the oldest
+        """
+        if SentenceTransformer is None:
+            raise RuntimeError(
+                "Semantic cache requires sentence-transformers, faiss-cpu and numpy"
+            )
+        
+        self.namespace = namespace
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.index_path = f"{path}.faiss"
+        self.sidecar_path = f"{path}.json"
+        self._model = SentenceTransformer(model_name)
+        self._index = faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension())
+        self._commands: List[str] = []
+        self._load()
+    
+    def _embed(self, text: str):
+        """Return the normalized embedding of text, so inner product is cosine."""
+        vectors = self._model.encode([text], normalize_embeddings=True)
+        return np.asarray(vectors, dtype='float32')
+    
+    def lookup(self, user_request: str) -> Optional[str]:
+        """Return the command of the most similar cached request, if close enough."""
+        if self._index.ntotal == 0:
+            return None
+        
+        scores, ids = self._index.search(self._embed(user_request), 1)
+        if ids[0][0] >= 0 and scores[0][0] >= self.threshold:
+            return self._commands[ids[0][0]]
+        return None
+    
+    def add(self, user_request: str, command: str):
+        """Cache the command interpreted for a request."""
+        self._index.add(self._embed(user_request))
+        self._commands.append(command)
+        self._trim()
+    
+    def _trim(self):
+        """Evict the oldest entries so at most maxsize remain."""
+        excess = len(self._commands) - self.maxsize
+        if excess > 0:
+            # Flat indexes renumber the remaining vectors, matching the list
+            self._index.remove_ids(np.arange(excess, dtype='int64'))
+            del self._commands[:excess]
+    
+    def _load(self):
+        """Load the index and sidecar, ignoring missing or mismatched files."""
+        try:
+            with open(self.sidecar_path, 'rb') as f:
+                sidecar = orjson.loads(f.read())
+            if sidecar.get('namespace') != self.namespace:
+                return
+            index = faiss.read_index(self.index_path)
+        except (OSError, ValueError, RuntimeError, AttributeError):
+            return
+        
+        commands = sidecar.get('commands', [])
+        if index.d == self._index.d and index.ntotal == len(commands):
+            self._index = index
+            self._commands = commands
+            self._trim()
+    
+    def save(self):
+        """Write the index and sidecar to disk. Failures are not fatal."""
+        try:
+            faiss.write_index(self._index, self.index_path)
+            with open(self.sidecar_path, 'wb') as f:
+                f.write(orjson.dumps({'namespace': self.namespace, 'commands': self._commands}))
+        except (OSError, RuntimeError) as e:
+            print(f"Could not save semantic cache: {e}", file=sys.stderr)
+
+
+class PowerShellSession:
+    """Long-lived pwsh process that executes commands sent over stdin.
+    
+    Starting pwsh takes hundreds of milliseconds, so a single process is
+    kept running and each command is followed by a marker that signals the
+    end of its output. Every command runs in a fresh runspace, so variables,
+    functions and $PSDefaultParameterValues it sets are discarded with it;
+    the working directory and environment variables, which belong to the
+    process, are restored afterwards.
+    """
+    
+    def __init__(self, executable: str = 'pwsh'):
+        """Initialize the session. The process is started on first use.
+        
+        Args:
+            executable: PowerShell executable to launch
+        """
+        self.executable = executable
+        self._proc: Optional[subprocess.Popen] = None
+        self._stdout: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stderr: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+    
+    def _start(self):
+        """Launch the pwsh process and the threads draining its output."""
+        self._proc = subprocess.Popen(
+            [self.executable, *PWSH_FLAGS, '-Command', '-'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        self._stdout = queue.Queue()
+        self._stderr = queue.Queue()
+        for stream, lines in ((self._proc.stdout, self._stdout),
+                              (self._proc.stderr, self._stderr)):
+            threading.Thread(target=self._pump, args=(stream, lines), daemon=True).start()
+        # Remember the process state that commands must not change
+        self._proc.stdin.write(
+            "$__cwd = [Environment]::CurrentDirectory; "
+            "$__env = [Environment]::GetEnvironmentVariables()\n"
+        )
+        self._proc.stdin.flush()
+    
+    @staticmethod
+    def _pump(stream, lines: "queue.Queue[Optional[str]]"):
+        """Forward lines from a pipe to a queue; None marks end of stream."""
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+    
+    def _read_until(self, lines: "queue.Queue[Optional[str]]", marker: str,
+                    deadline: float, max_bytes: Optional[int] = None) -> Tuple[List[str], str]:
+        """Collect lines until the marker appears.
+        
+        Output that does not end with a newline puts the marker in the middle
+        of a line, so the marker is searched for anywhere in each line.
+        Once max_bytes of output have been collected, further lines are
+        still consumed but discarded, so memory use stays bounded.
+        
+        Returns:
+            Tuple of (output before the marker, remainder of the marker line)
+        """
+        collected = []
+        size = 0
+        truncated = False
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise queue.Empty
+            line = lines.get(timeout=remaining)
+            if line is None:
+                raise RuntimeError("PowerShell session terminated unexpectedly")
+            head, found, tail = line.partition(marker)
+            if head and not truncated:
+                size += len(head.encode('utf-8'))
+                if max_bytes is not None and size > max_bytes:
+                    truncated = True
+                else:
+                    collected.append(head)
+            if found:
+                if truncated:
+                    collected.append(f"... output truncated after {max_bytes} bytes\n")
+                return collected, tail.strip()
+    
+    def run(self, command: str, timeout: float = 30,
+            max_output_bytes: Optional[int] = None) -> subprocess.CompletedProcess:
+        """Execute a command in the session.
+        
+        Args:
+            command: The PowerShell command to execute
+            timeout: Seconds to wait for the command to finish
+            max_output_bytes: Maximum size of stdout and stderr each to keep;
+                longer output ends with a truncation notice
+            
+        Returns:
+            CompletedProcess with return code 0 if the command succeeded
+            
+        Raises:
+            subprocess.TimeoutExpired: If the command did not finish in time;
+                the session is restarted on the next call
+        """
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            
+            # The command is passed base64-encoded so quotes or newlines in it
+            # cannot break the marker protocol
+            encoded = base64.b64encode(command.encode('utf-8')).decode('ascii')
+            marker = f"__DONE__{uuid.uuid4().hex}__"
+            # The command runs in its own runspace, so changes to variables,
+            # $PSDefaultParameterValues or the location do not outlive it.
+            # HadErrors also covers non-terminating errors, and terminating
+            # ones surface as an exception from Invoke().
+            script = (
+                "$__ps = [powershell]::Create(); $__ok = $false\n"
+                "try { $__out = $__ps.AddCommand('Set-Location')"
+                ".AddParameter('LiteralPath', $__cwd).AddStatement()"
+                ".AddScript([Text.Encoding]::UTF8.GetString("
+                f"[Convert]::FromBase64String('{encoded}')))"
+                ".AddCommand('Out-String').Invoke(); "
+                "[Console]::Out.Write(-join $__out); $__ok = -not $__ps.HadErrors; "
+                "if ($__ps.HadErrors) { [Console]::Error.Write(($__ps.Streams.Error | Out-String)) } } "
+                "catch { [Console]::Error.WriteLine($_.Exception.GetBaseException().Message) } "
+                "finally { $__ps.Dispose() }\n"
+                # The working directory and environment are shared by all
+                # runspaces in the process, so put them back explicitly
+                "[Environment]::CurrentDirectory = $__cwd; "
+                "foreach ($__k in @([Environment]::GetEnvironmentVariables().Keys)) "
+                "{ if (-not $__env.Contains($__k)) { [Environment]::SetEnvironmentVariable($__k, $null) } }; "
+                "foreach ($__k in $__env.Keys) { [Environment]::SetEnvironmentVariable($__k, $__env[$__k]) }\n"
+                f"[Console]::Out.WriteLine(\"{marker}$__ok\"); "
+                f"[Console]::Error.WriteLine('{marker}')\n"
+            )
+            
+            deadline = time.monotonic() + timeout
+            try:
+                self._proc.stdin.write(script)
+                self._proc.stdin.flush()
+                stdout, status = self._read_until(
+                    self._stdout, marker, deadline, max_output_bytes
+                )
+                stderr, _ = self._read_until(
+                    self._stderr, marker, deadline, max_output_bytes
+                )
+            except queue.Empty:
+                self._kill()
+                raise subprocess.TimeoutExpired(command, timeout)
+            except (OSError, RuntimeError):
+                self._kill()
+                raise RuntimeError("PowerShell session terminated unexpectedly")
+            
+            return subprocess.CompletedProcess(
+                args=command,
+                returncode=0 if status == 'True' else 1,
+                stdout=''.join(stdout),
+                stderr=''.join(stderr)
+            )
+    
+    def _kill(self):
+        """Forcefully stop the process so the next command starts a fresh one."""
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+    
+    def close(self):
+        """Shut down the pwsh process."""
+        with self._lock:
+            if self._proc is None:
+                return
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._proc.kill()
+                self._proc.wait()
+            self._proc = None
+
 
 class PowerShellAgent:
     """Natural language agent that executes PowerShell commands."""
     
+    # Substrings that are never allowed in a command (matched case-insensitively)
+    _DANGEROUS_PATTERNS = [
+        'Remove-', 'Delete-', 'Clear-', 'Set-', 'New-',
+        'Stop-', 'Restart-', 'Start-', 'Disable-', 'Enable-',
+        'Install-', 'Uninstall-', 'Invoke-Expression', 'iex',
+        ';', '|', '&', '>', '>>', '<', '`', '$(',
+        # Commands are single-line; a second line could alter session state
+        '\n', '\r'
+    ]
+    # Bare words such as the iex alias only match as whole words
+    _DANGEROUS_RE = re.compile(
+        '|'.join(rf'\b{pattern}\b' if pattern.isalnum() else re.escape(pattern)
+                 for pattern in _DANGEROUS_PATTERNS),
+        re.IGNORECASE
+    )
+    _DANGEROUS_NAMES = {pattern.lower(): pattern for pattern in _DANGEROUS_PATTERNS}
+    
     def __init__(self, config_path: str = "config.json"):
         """Initialize the PowerShell agent.
         
@@ -27,8 +452,7 @@ class PowerShellAgent:
         load_dotenv()
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
+        self._load_config(config_path)
         
         # Initialize NVIDIA API client
         api_key = os.getenv('NVIDIA_API_KEY')
@@ -36,26 +460,116 @@ class PowerShellAgent:
             raise ValueError("NVIDIA_API_KEY not found in environment variables")
         
         api_endpoint = os.getenv('API_ENDPOINT', 'https://integrate.api.nvidia.com/v1')
+        self._api_key = api_key
+        self._api_endpoint = api_endpoint
+        
+        # Keep connections alive so only the first LLM call pays the TLS handshake
+        self._http_client = httpx.Client(
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT,
+            http2=True
+        )
         
         self.client = OpenAI(
             base_url=api_endpoint,
-            api_key=api_key
+            api_key=api_key,
+            http_client=self._http_client
         )
         
-        # Check if PowerShell is available
+        # Async client for batch processing, created per event loop
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Interpretations currently awaiting the LLM, keyed by user request
+        self._inflight: Dict[str, "asyncio.Task[Optional[str]]"] = {}
+        
+        # Open the connection in the background so the first request is warm
+        threading.Thread(
+            target=self._warm_connection,
+            args=(api_endpoint,),
+            daemon=True
+        ).start()
+        
+        # Cache LLM responses and persist them on exit, if they are cacheable
+        self._response_cache = None
+        if self._caching_enabled():
+            self._response_cache = ResponseCache()
+            atexit.register(self._response_cache.save)
+        
+        # Optionally match paraphrased requests via embeddings
+        self._semantic_cache = None
+        if self.config.get('semantic_cache', False):
+            namespace = ResponseCache.make_key(
+                self.config['nemotron_model'], ','.join(self.config['restricted_commands']),
+                '', self.config['temperature'], self.config['max_tokens']
+            )
+            try:
+                self._semantic_cache = SemanticCache(
+                    namespace,
+                    threshold=self.config.get('semantic_cache_threshold', 0.92)
+                )
+                atexit.register(self._semantic_cache.save)
+            except Exception as e:
+                print(f"Semantic cache disabled: {e}", file=sys.stderr)
+        
+        self._init_powershell()
+    
+    def _load_config(self, config_path: str):
+        """Load the configuration and derive the allowed command lookup.
+        
+        Args:
+            config_path: Path to the configuration file
+        """
+        self.config = load_config(config_path)
+        self._allowed_commands = frozenset(self.config['restricted_commands'])
+        # The prompt is static, which also keeps it identical for provider-side prefix caching
+        self._system_prompt = self._build_system_prompt()
+    
+    def _init_powershell(self):
+        """Check that PowerShell is available and start its session."""
         self._check_powershell()
+        self._session = PowerShellSession()
+    
+    def _warm_connection(self, api_endpoint: str):
+        """Establish a pooled connection to the API endpoint ahead of time.
+        
+        Args:
+            api_endpoint: Base URL of the LLM API
+        """
+        try:
+            self._http_client.head(f"{api_endpoint.rstrip('/')}/models", timeout=3.0)
+        except httpx.HTTPError:
+            # Warming is best effort; the first real request will connect itself
+            pass
     
     def _check_powershell(self):
-        """Verify that PowerShell (pwsh) is installed."""
+        """Verify that PowerShell (pwsh) is installed.
+        
+        The probe result is cached on disk and reused as long as the pwsh
+        binary has not changed, which avoids spawning pwsh on every startup.
+        """
+        pwsh_path = shutil.which('pwsh')
+        if pwsh_path is None:
+            raise RuntimeError(
+                "PowerShell (pwsh) is not installed. "
+                "Please install PowerShell from https://github.com/PowerShell/PowerShell"
+            )
+        
+        mtime = os.path.getmtime(os.path.realpath(pwsh_path))
+        probe = self._load_pwsh_probe()
+        if probe.get('path') == pwsh_path and probe.get('mtime') == mtime:
+            print(f"PowerShell detected: {probe['version']}")
+            return
+        
         try:
             result = subprocess.run(
-                ['pwsh', '-Command', '$PSVersionTable.PSVersion'],
+                [pwsh_path, *PWSH_FLAGS, '-Command', '$PSVersionTable.PSVersion'],
                 capture_output=True,
                 text=True,
                 timeout=5
             )
             if result.returncode == 0:
-                print(f"PowerShell detected: {result.stdout.strip()}")
+                version = result.stdout.strip()
+                print(f"PowerShell detected: {version}")
             else:
                 raise RuntimeError("PowerShell (pwsh) is not responding correctly")
         except FileNotFoundError:
@@ -63,21 +577,33 @@ class PowerShellAgent:
                 "PowerShell (pwsh) is not installed. "
                 "Please install PowerShell from https://github.com/PowerShell/PowerShell"
             )
-    
-    def _is_command_allowed(self, command: str) -> bool:
-        """Check if a PowerShell command is in the restricted list.
-        
-        Args:
-            command: The PowerShell command to check
-            
-        Returns:
-            True if the command is allowed, False otherwise
-        """
-        # Extract the cmdlet name (first word)
-        cmdlet = command.strip().split()[0] if command.strip() else ""
         
-        # Check if it's in the allowed list
-        return cmdlet in self.config['restricted_commands']
+        self._save_pwsh_probe({'path': pwsh_path, 'mtime': mtime, 'version': version})
+    
+    def _load_pwsh_probe(self) -> Dict[str, Any]:
+        """Load the cached pwsh probe result, or an empty dict if unavailable."""
+        try:
+            with open(PWSH_PROBE_CACHE_PATH, 'rb') as f:
+                probe = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        return probe if isinstance(probe, dict) and 'version' in probe else {}
+    
+    def _save_pwsh_probe(self, probe: Dict[str, Any]):
+        """Cache the pwsh probe result. Failures are not fatal."""
+        try:
+            os.makedirs(os.path.dirname(PWSH_PROBE_CACHE_PATH), exist_ok=True)
+            with open(PWSH_PROBE_CACHE_PATH, 'wb') as f:
+                f.write(orjson.dumps(probe))
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _cmdlet_name(command: str) -> str:
+        """Extract the cmdlet name (first word) of a command."""
+        # Split off only the first word instead of tokenizing all arguments
+        parts = command.split(None, 1)
+        return parts[0] if parts else ""
     
     def _validate_command(self, command: str) -> Tuple[bool, str]:
         """Validate a PowerShell command for safety.
@@ -88,27 +614,39 @@ class PowerShellAgent:
         Returns:
             Tuple of (is_valid, error_message)
         """
+        error_code, error_msg = self._validate_cached(command, self._allowed_commands)
+        return error_code == ErrorCode.OK, error_msg
+    
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def _validate_cached(cls, command: str,
+                         allowed_commands: FrozenSet[str]) -> Tuple[ErrorCode, str]:
+        """Validate a command against an allow list, memoizing the result.
+        
+        The allow list is part of the cache key, so results stay correct
+        for agents with different configurations.
+        
+        Returns:
+            Tuple of (error_code, error_message)
+        """
         if not command or not command.strip():
-            return False, "Empty command"
+            return ErrorCode.EMPTY_COMMAND, "Empty command"
         
         # Check for dangerous patterns
-        dangerous_patterns = [
-            'Remove-', 'Delete-', 'Clear-', 'Set-', 'New-', 
-            'Stop-', 'Restart-', 'Start-', 'Disable-', 'Enable-',
-            'Install-', 'Uninstall-', 'Invoke-Expression', 'iex',
-            ';', '|', '&', '>', '>>', '<'
-        ]
-        
-        for pattern in dangerous_patterns:
-            if pattern.lower() in command.lower():
-                return False, f"Command contains dangerous pattern: {pattern}"
+        match = cls._DANGEROUS_RE.search(command)
+        if match:
+            pattern = cls._DANGEROUS_NAMES[match.group(0).lower()]
+            # Show line breaks as escapes so the message stays on one line
+            pattern = pattern.encode('unicode_escape').decode('ascii')
+            return ErrorCode.DANGEROUS_PATTERN, f"Command contains dangerous pattern: {pattern}"
         
         # Check if command is in allowed list
-        if not self._is_command_allowed(command):
-            cmdlet = command.strip().split()[0] if command.strip() else ""
-            return False, f"Command '{cmdlet}' is not in the restricted command list"
+        cmdlet = cls._cmdlet_name(command)
+        if cmdlet not in allowed_commands:
+            return (ErrorCode.NOT_ALLOWED,
+                    f"Command '{cmdlet}' is not in the restricted command list")
         
-        return True, ""
+        return ErrorCode.OK, ""
     
     def execute_powershell(self, command: str) -> Dict[str, Any]:
         """Execute a PowerShell command safely.
@@ -120,28 +658,30 @@ class PowerShellAgent:
             Dictionary with execution results
         """
         # Validate command
-        is_valid, error_msg = self._validate_command(command)
-        if not is_valid:
+        error_code, error_msg = self._validate_cached(command, self._allowed_commands)
+        if error_code != ErrorCode.OK:
             return {
                 'success': False,
                 'error': error_msg,
+                'error_code': error_code,
                 'output': '',
                 'command': command
             }
         
         try:
             # Execute the command
-            result = subprocess.run(
-                ['pwsh', '-Command', command],
-                capture_output=True,
-                text=True,
-                timeout=30
+            result = self._session.run(
+                command,
+                timeout=30,
+                max_output_bytes=self.config.get('max_output_bytes')
             )
             
             return {
                 'success': result.returncode == 0,
                 'output': result.stdout,
                 'error': result.stderr if result.returncode != 0 else '',
+                'error_code': (ErrorCode.OK if result.returncode == 0
+                               else ErrorCode.EXECUTION_FAILED),
                 'command': command,
                 'return_code': result.returncode
             }
@@ -149,6 +689,7 @@ class PowerShellAgent:
             return {
                 'success': False,
                 'error': 'Command execution timed out',
+                'error_code': ErrorCode.TIMEOUT,
                 'output': '',
                 'command': command
             }
@@ -156,21 +697,28 @@ class PowerShellAgent:
             return {
                 'success': False,
                 'error': str(e),
+                'error_code': ErrorCode.INTERNAL_ERROR,
                 'output': '',
                 'command': command
             }
     
-    def interpret_request(self, user_request: str) -> Optional[str]:
-        """Use LLM to interpret natural language request into PowerShell command.
+    def execute_powershell_batch(self, commands: List[str]) -> List[Dict[str, Any]]:
+        """Execute several PowerShell commands one after another.
+        
+        All commands share the agent's warm PowerShell session, so a batch
+        does not start any additional pwsh processes.
         
         Args:
-            user_request: Natural language request from user
+            commands: The PowerShell commands to execute
             
         Returns:
-            PowerShell command or None if interpretation fails
+            List of execution results in the order of commands
         """
-        # Build the system prompt
-        system_prompt = f"""You are a PowerShell expert assistant. Convert natural language requests into PowerShell commands.
+        return [self.execute_powershell(command) for command in commands]
+    
+    def _build_system_prompt(self) -> str:
+        """Build the system prompt listing the allowed cmdlets."""
+        return f"""You are a PowerShell expert assistant. Convert natural language requests into PowerShell commands.
 
 You can ONLY use these PowerShell cmdlets:
 {', '.join(self.config['restricted_commands'])}
@@ -183,30 +731,278 @@ Rules:
 5. Keep commands simple and safe
 
 If the request cannot be fulfilled with the allowed commands, respond with "CANNOT_EXECUTE"."""
-
-        try:
-            # Call the LLM
-            response = self.client.chat.completions.create(
-                model=self.config['nemotron_model'],
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_request}
-                ],
-                temperature=self.config['temperature'],
-                max_tokens=self.config['max_tokens']
+    
+    def _completion_args(self, system_prompt: str, user_request: str) -> Dict[str, Any]:
+        """Build the arguments for a chat completion call."""
+        return {
+            'model': self.config['nemotron_model'],
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_request}
+            ],
+            'temperature': self.config['temperature'],
+            'max_tokens': self.config['max_tokens']
+        }
+    
+    def _caching_enabled(self) -> bool:
+        """Return whether LLM responses are deterministic enough to cache."""
+        return self.config['temperature'] <= 0
+    
+    def _cache_key(self, system_prompt: str, user_request: str) -> Optional[str]:
+        """Return the response cache key, or None if caching is not safe."""
+        if not self._caching_enabled():
+            return None
+        return ResponseCache.make_key(
+            self.config['nemotron_model'], system_prompt, user_request,
+            self.config['temperature'], self.config['max_tokens']
+        )
+    
+    def _cached_response(self, cache_key: Optional[str], user_request: str) -> Optional[str]:
+        """Look up a previous response in the exact-match and semantic caches."""
+        if cache_key is None:
+            return None
+        
+        response = self._response_cache.get(cache_key)
+        if response is None and self._semantic_cache is not None:
+            response = self._semantic_cache.lookup(user_request)
+        return response
+    
+    def _store_response(self, cache_key: Optional[str], user_request: str, response: str):
+        """Remember a response from the LLM in the caches."""
+        # An empty response is likely transient and must not suppress retries
+        if cache_key is None or not response:
+            return
+        
+        self._response_cache.put(cache_key, response)
+        if self._semantic_cache is not None and self._parse_command(response):
+            self._semantic_cache.add(user_request, response)
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Return the text carried by a streamed completion chunk."""
+        if not chunk.choices:
+            return ''
+        return chunk.choices[0].delta.content or ''
+    
+    @staticmethod
+    def _first_line(response: str) -> str:
+        """Return the first non-empty line of a response.
+        
+        Commands are single-line per the system prompt, so anything after
+        the first line is ignored.
+        """
+        return response.strip().split('\n', 1)[0].strip()
+    
+    @staticmethod
+    def _parse_command(response: str) -> Optional[str]:
+        """Return the command from an LLM response, or None if there is none."""
+        # Check if LLM couldn't fulfill request
+        if response == "CANNOT_EXECUTE" or not response:
+            return None
+        
+        return response
+    
+    def interpret_request(self, user_request: str) -> Optional[str]:
+        """Use LLM to interpret natural language request into PowerShell command.
+        
+        Args:
+            user_request: Natural language request from user
+            
+        Returns:
+            PowerShell command or None if interpretation fails
+        """
+        system_prompt = self._system_prompt
+        cache_key = self._cache_key(system_prompt, user_request)
+        response = self._cached_response(cache_key, user_request)
+        
+        if response is None:
+            try:
+                # Call the LLM, stopping as soon as the first line is complete
+                response = ''
+                with self.client.chat.completions.create(
+                    **self._completion_args(system_prompt, user_request),
+                    stream=True
+                ) as stream:
+                    for chunk in stream:
+                        response += self._chunk_text(chunk)
+                        if '\n' in response.lstrip():
+                            break
+                response = self._first_line(response)
+                
+            except Exception as e:
+                print(f"Error interpreting request: {e}", file=sys.stderr)
+                return None
+            
+            self._store_response(cache_key, user_request, response)
+        
+        return self._parse_command(response)
+    
+    def _new_async_client(self) -> AsyncOpenAI:
+        """Create an async LLM client with its own connection pool."""
+        return AsyncOpenAI(
+            base_url=self._api_endpoint,
+            api_key=self._api_key,
+            http_client=httpx.AsyncClient(
+                limits=HTTP_LIMITS,
+                timeout=HTTP_TIMEOUT,
+                http2=True
             )
+        )
+    
+    async def _get_async_client(self) -> AsyncOpenAI:
+        """Return an async LLM client bound to the running event loop.
+        
+        Pooled connections cannot be shared between event loops, so a new
+        client is created whenever the loop changes (e.g. per asyncio.run)
+        and the previous one is closed.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_client
+        if client is None or self._async_client_loop is not loop:
+            previous = client
+            # Install the new client before awaiting, so concurrent callers share it
+            client = self._new_async_client()
+            self._async_client = client
+            self._async_client_loop = loop
+            await self._close_client(previous)
+        return client
+    
+    @staticmethod
+    async def _close_client(client: Optional[AsyncOpenAI]):
+        """Close an async LLM client, ignoring failures."""
+        if client is None:
+            return
+        
+        try:
+            await client.close()
+        except Exception:
+            # A client from an event loop that has since closed cannot shut
+            # down cleanly; its sockets are released when it is collected
+            pass
+    
+    async def interpret_request_async(self, user_request: str) -> Optional[str]:
+        """Asynchronous variant of interpret_request.
+        
+        Concurrent calls with the same request share a single LLM call.
+        
+        Args:
+            user_request: Natural language request from user
             
-            command = response.choices[0].message.content.strip()
+        Returns:
+            PowerShell command or None if interpretation fails
+        """
+        # Shield the shared task so one cancelled caller does not cancel the others
+        return await asyncio.shield(self._interpret_task(user_request))
+    
+    def _interpret_task(self, user_request: str,
+                        client: Optional[AsyncOpenAI] = None) -> "asyncio.Task[Optional[str]]":
+        """Return the in-flight interpretation of a request, starting it if needed.
+        
+        Args:
+            user_request: Natural language request from user
+            client: Async LLM client to use instead of the agent-wide one
             
-            # Check if LLM couldn't fulfill request
-            if command == "CANNOT_EXECUTE" or not command:
+        Returns:
+            Task resolving to the PowerShell command or None
+        """
+        task = self._inflight.get(user_request)
+        if task is None:
+            task = asyncio.ensure_future(self._interpret_request_async(user_request, client))
+            self._inflight[user_request] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_request, None))
+        return task
+    
+    async def _interpret_request_async(self, user_request: str,
+                                       client: Optional[AsyncOpenAI] = None) -> Optional[str]:
+        """Interpret a request with the given or the agent-wide async LLM client."""
+        system_prompt = self._system_prompt
+        cache_key = self._cache_key(system_prompt, user_request)
+        response = self._cached_response(cache_key, user_request)
+        
+        if response is None:
+            try:
+                # Call the LLM, stopping as soon as the first line is complete
+                response = ''
+                if client is None:
+                    client = await self._get_async_client()
+                async with await client.chat.completions.create(
+                    **self._completion_args(system_prompt, user_request),
+                    stream=True
+                ) as stream:
+                    async for chunk in stream:
+                        response += self._chunk_text(chunk)
+                        if '\n' in response.lstrip():
+                            break
+                response = self._first_line(response)
+                
+            except Exception as e:
+                print(f"Error interpreting request: {e}", file=sys.stderr)
                 return None
             
-            return command
+            self._store_response(cache_key, user_request, response)
+        
+        return self._parse_command(response)
+    
+    async def process_batch(self, user_requests: List[str],
+                            max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Process several natural language requests concurrently.
+        
+        Requests are interpreted in parallel, limited to max_concurrency
+        in-flight LLM calls, and the resulting commands are then executed
+        one after another with execute_powershell_batch.
+        
+        Args:
+            user_requests: Natural language requests from the user
+            max_concurrency: Maximum number of concurrent LLM calls
             
-        except Exception as e:
-            print(f"Error interpreting request: {e}", file=sys.stderr)
-            return None
+        Returns:
+            List of processing results in the order of user_requests
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # Each batch uses its own client, so finishing one batch cannot close
+        # a client that another batch or caller is still using
+        client = self._new_async_client()
+        tasks = []
+        
+        async def interpret(user_request: str) -> Optional[str]:
+            async with semaphore:
+                task = self._interpret_task(user_request, client)
+                tasks.append(task)
+                return await asyncio.shield(task)
+        
+        try:
+            commands = await asyncio.gather(*(interpret(r) for r in user_requests))
+        finally:
+            # If the batch was cancelled, shielded interpretations may still be
+            # using the client on behalf of other callers
+            pending = [task for task in tasks if not task.done()]
+            if pending:
+                await asyncio.wait(pending)
+            await self._close_client(client)
+        
+        # Execute the interpreted commands without blocking the event loop
+        loop = asyncio.get_running_loop()
+        executed = iter(await loop.run_in_executor(
+            None, self.execute_powershell_batch,
+            [command for command in commands if command]
+        ))
+        
+        results = []
+        for user_request, command in zip(user_requests, commands):
+            if not command:
+                results.append({
+                    'success': False,
+                    'error': 'Could not interpret request or request requires disallowed commands',
+                    'error_code': ErrorCode.INTERPRETATION_FAILED,
+                    'user_request': user_request
+                })
+            else:
+                results.append({
+                    'user_request': user_request,
+                    'interpreted_command': command,
+                    **next(executed)
+                })
+        return results
     
     def process_request(self, user_request: str) -> Dict[str, Any]:
         """Process a natural language request end-to-end.
@@ -227,6 +1023,7 @@ If the request cannot be fulfilled with the allowed commands, respond with "CANN
             return {
                 'success': False,
                 'error': 'Could not interpret request or request requires disallowed commands',
+                'error_code': ErrorCode.INTERPRETATION_FAILED,
                 'user_request': user_request
             }
         
@@ -9,9 +9,11 @@ natural language input and the LLM would interpret it.
 
 import sys
 import os
+from functools import lru_cache
 
 # Add current directory to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _HERE)
 
 from agent import PowerShellAgent
 
@@ -20,10 +22,8 @@ class DemoAgent(PowerShellAgent):
     
     def __init__(self):
         """Initialize without API client."""
-        import json
-        with open('config.json', 'r') as f:
-            self.config = json.load(f)
-        self._check_powershell()
+        self._load_config(os.path.join(_HERE, 'config.json'))
+        self._init_powershell()
     
     def demo_request(self, description: str, command: str):
         """Demonstrate processing a request with a pre-defined command.
@@ -46,6 +46,15 @@ class DemoAgent(PowerShellAgent):
         
         return result
 
+@lru_cache(maxsize=None)
+def get_demo_agent() -> DemoAgent:
+    """Return the shared demo agent, creating it on first use.
+    
+    Reusing the agent avoids probing PowerShell and starting new sessions
+    when the demo runs several times in the same process.
+    """
+    return DemoAgent()
+
 def main():
     """Run demo examples."""
     print("🚀 PowerShell Natural Language Agent - DEMO MODE")
@@ -54,7 +63,7 @@ def main():
     print("      the Nemotron Nano v2 LLM interprets natural language.")
     print("=" * 70)
     
-    agent = DemoAgent()
+    agent = get_demo_agent()
     
     # Example 1: Get current date
     agent.demo_request(
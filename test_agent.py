@@ -6,33 +6,101 @@ This script tests the command validation and execution
 without requiring an API key.
 """
 
+import asyncio
 import sys
 import os
+import queue
+import tempfile
+import time
+from functools import lru_cache
+from types import SimpleNamespace
 
 # Add current directory to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _HERE)
 
-def test_command_validation():
-    """Test command validation logic."""
-    from agent import PowerShellAgent
+from agent import ErrorCode, PowerShellAgent, PowerShellSession, ResponseCache
+
+# Create a mock agent without initializing the API client
+class MockAgent(PowerShellAgent):
+    def __init__(self):
+        # Load configuration without initializing the client
+        self._load_config(os.path.join(_HERE, 'config.json'))
+        # Skip API client initialization
+        self._init_powershell()
+
+class StubStream:
+    """Streamed completion that yields its text as a single chunk."""
+    
+    def __init__(self, text: str):
+        self.text = text
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
     
-    print("Testing command validation (without API key requirement)...")
-    print("=" * 60)
+    async def __aiter__(self):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.text))])
+
+class StubAsyncClient:
+    """Stand-in for AsyncOpenAI that answers every request after a delay."""
+    
+    def __init__(self, command: str = "Get-Date", delay: float = 0.05):
+        self.command = command
+        self.delay = delay
+        self.calls = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
     
-    # Create a mock agent without initializing the API client
-    class MockAgent(PowerShellAgent):
-        def __init__(self):
-            # Load configuration without initializing the client
-            import json
-            with open('config.json', 'r') as f:
-                self.config = json.load(f)
-            # Skip API client initialization
-            self._check_powershell()
+    async def _create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.closed:
+            raise RuntimeError("client has been closed")
+        return StubStream(self.command)
+    
+    async def close(self):
+        self.closed = True
+
+# Agent with stub LLM clients that neither needs an API key nor PowerShell
+class StubLLMAgent(PowerShellAgent):
+    def __init__(self):
+        self._load_config(os.path.join(_HERE, 'config.json'))
+        self._response_cache = ResponseCache(os.devnull)
+        self._semantic_cache = None
+        self._async_client = None
+        self._async_client_loop = None
+        self._inflight = {}
+        self.clients = []
+    
+    def _new_async_client(self):
+        client = StubAsyncClient()
+        self.clients.append(client)
+        return client
+    
+    def execute_powershell_batch(self, commands):
+        return [{'success': True, 'output': '', 'error': '', 'error_code': ErrorCode.OK,
+                 'command': command} for command in commands]
+
+@lru_cache(maxsize=None)
+def get_agent():
+    """Return the mock agent shared by all tests, probing PowerShell only once."""
+    return MockAgent()
+
+def test_command_validation():
+    """Test command validation logic."""
+    agent = get_agent()
     
-    agent = MockAgent()
+    # Collect the report and write it once at the end
+    lines = [
+        "Testing command validation (without API key requirement)...",
+        "=" * 60
+    ]
     
     # Test valid commands
-    print("\n✅ Testing VALID commands:")
+    lines.append("\n✅ Testing VALID commands:")
     valid_commands = [
         "Get-Process",
         "Get-Service",
@@ -41,31 +109,38 @@ def test_command_validation():
         "Test-Connection localhost"
     ]
     
+    failures = []
     for cmd in valid_commands:
         is_valid, msg = agent._validate_command(cmd)
         status = "✅ PASS" if is_valid else f"❌ FAIL: {msg}"
-        print(f"  {cmd:40} -> {status}")
+        lines.append(f"  {cmd:40} -> {status}")
+        if not is_valid:
+            failures.append(f"{cmd} should be allowed: {msg}")
     
     # Test invalid commands
-    print("\n❌ Testing INVALID commands (should fail):")
+    lines.append("\n❌ Testing INVALID commands (should fail):")
     invalid_commands = [
         "Remove-Item test.txt",
         "Set-Service MyService",
         "Get-Process | Stop-Process",
         "Get-ChildItem > output.txt",
         "Invoke-Expression 'malicious code'",
+        "Get-Content $(Get-Location)",
+        "Get-ChildItem C:`\\Windows",
         "Get-UnknownCommand"
     ]
     
     for cmd in invalid_commands:
         is_valid, msg = agent._validate_command(cmd)
         status = "✅ PASS (correctly blocked)" if not is_valid else f"❌ FAIL: Should have been blocked"
-        print(f"  {cmd:40} -> {status}")
+        lines.append(f"  {cmd:40} -> {status}")
         if not is_valid:
-            print(f"     Reason: {msg}")
+            lines.append(f"     Reason: {msg}")
+        else:
+            failures.append(f"{cmd} should have been blocked")
     
     # Test actual execution of safe commands
-    print("\n⚡ Testing EXECUTION of safe commands:")
+    lines.append("\n⚡ Testing EXECUTION of safe commands:")
     exec_commands = [
         "Get-Date",
         "Get-Location",
@@ -76,12 +151,191 @@ def test_command_validation():
         result = agent.execute_powershell(cmd)
         if result['success']:
             output_preview = result['output'].strip()[:60]
-            print(f"  ✅ {cmd:30} -> {output_preview}...")
+            lines.append(f"  ✅ {cmd:30} -> {output_preview}...")
         else:
-            print(f"  ❌ {cmd:30} -> Error: {result['error']}")
+            lines.append(f"  ❌ {cmd:30} -> Error: {result['error']}")
+    
+    lines.append("\n" + "=" * 60)
+    lines.append("✅ All tests completed!")
+    sys.stdout.write("\n".join(lines) + "\n")
+    
+    assert not failures, failures
+
+def test_multiline_command_blocked():
+    """Test that commands spanning several lines are rejected."""
+    agent = get_agent()
+    
+    for cmd in ["Get-Date\n$PSDefaultParameterValues['Get-ChildItem:Path']='/etc'",
+                "Get-Process\r\nGet-Date"]:
+        is_valid, msg = agent._validate_command(cmd)
+        print(f"  {cmd!r} -> {msg}")
+        assert not is_valid
+
+def test_error_codes():
+    """Test that rejected and failed commands report the matching error code."""
+    agent = get_agent()
+    
+    expected = [
+        ("Get-Date", ErrorCode.OK),
+        ("Remove-Item test.txt", ErrorCode.DANGEROUS_PATTERN),
+        ("Get-UnknownCommand", ErrorCode.NOT_ALLOWED),
+        ("Get-Item /nonexistent", ErrorCode.EXECUTION_FAILED),
+    ]
+    
+    for cmd, error_code in expected:
+        result = agent.execute_powershell(cmd)
+        print(f"  {cmd:30} -> {result['error_code']!r}")
+        assert result['error_code'] == error_code
+
+def test_failed_command_reports_error():
+    """Test that an allowed command which fails is reported as a failure."""
+    agent = get_agent()
+    
+    result = agent.execute_powershell("Get-Item /nonexistent")
+    print(f"  Get-Item /nonexistent -> success={result['success']}")
+    
+    assert not result['success']
+    assert result['error'].strip()
+
+def test_command_side_effects_do_not_persist():
+    """Test that state changed by one command is not visible to the next."""
+    agent = get_agent()
+    
+    start = agent.execute_powershell("Get-Location")['output']
+    for cmd in ["Get-Date -Format (cd /)",
+                "Get-Date -Format ($PSDefaultParameterValues['Get-Date:Format']='yyyy')"]:
+        result = agent.execute_powershell(cmd)
+        print(f"  {cmd:70} -> success={result['success']}")
+    
+    assert agent.execute_powershell("Get-Location")['output'] == start
+    assert not agent.execute_powershell("Get-Date")['output'].strip().isdigit()
+
+def test_marker_after_partial_line():
+    """Test that the end marker is found after output without a newline."""
+    session = PowerShellSession()
+    lines = queue.Queue()
+    for line in ["first\n", "partial__DONE__test__True\n"]:
+        lines.put(line)
+    
+    output, status = session._read_until(lines, "__DONE__test__", time.monotonic() + 1)
+    print(f"  {output!r} -> {status}")
+    
+    assert output == ["first\n", "partial"]
+    assert status == "True"
+
+def test_output_truncated_after_max_bytes():
+    """Test that output beyond max_bytes is drained and replaced by a notice."""
+    session = PowerShellSession()
+    lines = queue.Queue()
+    for i in range(10):
+        lines.put(f"line {i}\n")
+    lines.put("__DONE__test__True\n")
+    
+    output, status = session._read_until(lines, "__DONE__test__", time.monotonic() + 1,
+                                         max_bytes=14)
+    print(f"  {output!r} -> {status}")
+    
+    assert output == ["line 0\n", "line 1\n", "... output truncated after 14 bytes\n"]
+    assert lines.empty()
+    assert status == "True"
+
+def test_concurrent_batches_keep_their_clients():
+    """Test that a finished batch does not close the client of a running one."""
+    agent = StubLLMAgent()
+    
+    async def run_batches():
+        first = asyncio.ensure_future(agent.process_batch(["first request"]))
+        await asyncio.sleep(0.02)
+        second = await agent.process_batch(["second request"])
+        return await first + second
+    
+    results = asyncio.run(run_batches())
+    for result in results:
+        print(f"  {result['user_request']:20} -> {result['error_code']!r}")
+    
+    assert all(result['success'] for result in results)
+    assert all(client.closed for client in agent.clients)
+
+def test_concurrent_identical_requests_share_llm_call():
+    """Test that identical in-flight requests share one LLM call and cancellation."""
+    agent = StubLLMAgent()
+    
+    async def run_requests():
+        first = asyncio.ensure_future(agent.interpret_request_async("Show the date"))
+        second = asyncio.ensure_future(agent.interpret_request_async("Show the date"))
+        await asyncio.sleep(0.01)
+        # Cancelling one caller must not cancel the shared LLM call
+        first.cancel()
+        return first, await second
+    
+    first, command = asyncio.run(run_requests())
+    calls = sum(client.calls for client in agent.clients)
+    print(f"  second caller -> {command} after {calls} LLM call(s)")
+    
+    assert first.cancelled()
+    assert command == "Get-Date"
+    assert calls == 1
+
+def test_response_cache_evicts_least_recently_used():
+    """Test that the response cache drops the least recently used entry."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, 'cache.json'), maxsize=2)
+        cache.put('a', 'Get-Date')
+        cache.put('b', 'Get-Process')
+        cache.get('a')
+        cache.put('c', 'Get-Location')
+        
+        assert cache.get('a') == 'Get-Date'
+        assert cache.get('b') is None
+        assert cache.get('c') == 'Get-Location'
+
+def test_response_cache_round_trip():
+    """Test that saved responses are loaded again by a new cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.json')
+        cache = ResponseCache(path)
+        cache.put('a', 'Get-Date')
+        cache.save()
+        
+        assert ResponseCache(path).get('a') == 'Get-Date'
+
+def test_response_cache_ignores_corrupt_file():
+    """Test that corrupt cache files and invalid entries are ignored."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.json')
+        with open(path, 'w') as f:
+            f.write('{not json')
+        assert ResponseCache(path).get('a') is None
+        
+        with open(path, 'w') as f:
+            f.write('{"a": "", "b": 42, "c": "Get-Date"}')
+        cache = ResponseCache(path)
+        assert cache.get('a') is None
+        assert cache.get('b') is None
+        assert cache.get('c') == 'Get-Date'
+
+def test_empty_response_not_cached():
+    """Test that an empty LLM response does not suppress later retries."""
+    agent = StubLLMAgent()
+    cache_key = agent._cache_key(agent._system_prompt, "Show the date")
+    
+    agent._store_response(cache_key, "Show the date", '')
+    assert agent._cached_response(cache_key, "Show the date") is None
     
-    print("\n" + "=" * 60)
-    print("✅ All tests completed!")
+    agent._store_response(cache_key, "Show the date", 'Get-Date')
+    assert agent._cached_response(cache_key, "Show the date") == 'Get-Date'
 
 if __name__ == '__main__':
     test_command_validation()
+    test_multiline_command_blocked()
+    test_error_codes()
+    test_failed_command_reports_error()
+    test_command_side_effects_do_not_persist()
+    test_marker_after_partial_line()
+    test_output_truncated_after_max_bytes()
+    test_concurrent_batches_keep_their_clients()
+    test_concurrent_identical_requests_share_llm_call()
+    test_response_cache_evicts_least_recently_used()
+    test_response_cache_round_trip()
+    test_response_cache_ignores_corrupt_file()
+    test_empty_response_not_cached()